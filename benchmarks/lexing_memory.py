@@ -0,0 +1,61 @@
+"""
+Measures the memory used by lexing with tracemalloc, with tokens shared between occurrences (as the interpreter
+does) and with a fresh token allocated for every occurrence (as it used to). Run from the repository root:
+
+    python benchmarks/lexing_memory.py > bench_output.txt
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'src'))
+
+from reverse_polish_calculator.rpnlanginterpreter import RpnlangInterpreter  # noqa: E402
+from reverse_polish_calculator.token import Token  # noqa: E402
+
+PROGRAMS = {
+    'literals and operators': ' '.join(['1 2 + 3 * 4 - dup drop 0x10 & 1.5 +'] * 20000),
+    'symbols and references': ' '.join(['{ 2 * } &$double = 21 $double &$double del'] * 10000),
+    'factorial library': ' '.join(['{ floor dup 0 <= { drop 1 } { dup 1 - $fact * } ifelse } &$fact ='] * 10000),
+}
+
+
+def fresh_tokens(rpn):
+    """
+    Make `rpn` allocate a new token, and a new value, for every occurrence instead of sharing them.
+    """
+    def parse_token(token):
+        parsed = RpnlangInterpreter._parse_token(rpn, token)
+        if parsed is None:
+            return None
+        value, token_type = parsed
+        if isinstance(value, (int, float)):
+            value = type(value)(str(value))
+        return Token(value, token_type)
+
+    rpn._parse_token = parse_token
+    return rpn
+
+
+def measure(rpn, program):
+    tracemalloc.start()
+    start = time.perf_counter()
+    rpn._tokenize(program)
+    elapsed = time.perf_counter() - start
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(rpn._tokens), retained, peak, elapsed
+
+
+def main():
+    print(f"{'program':<24} {'variant':<8} {'tokens':>8} {'retained':>10} {'peak':>10} {'time':>8}")
+    for name, program in PROGRAMS.items():
+        for label, rpn in (('fresh', fresh_tokens(RpnlangInterpreter())), ('shared', RpnlangInterpreter())):
+            Token.parse_value_token.cache_clear()
+            count, retained, peak, elapsed = measure(rpn, program)
+            print(f'{name:<24} {label:<8} {count:>8} {retained / 1e6:>8.2f}MB {peak / 1e6:>8.2f}MB {elapsed:>7.3f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
 #!/usr/bin/env bash
 export PIPENV_VENV_IN_PROJECT=true
-pipenv install --dev && pipenv run build $(pipenv --venv) && echo "Successfully compiled to '$PWD/dist/rpn'"
+pipenv install --dev || exit 1
+# The native dispatch loop is optional, the interpreter falls back to pure Python without it.
+pipenv run python setup_native.py || echo "Could not build the native dispatch loop, using pure Python instead"
+pipenv run build $(pipenv --venv) && echo "Successfully compiled to '$PWD/dist/rpn'"
@@ -0,0 +1,15 @@
+"""
+Builds the optional native dispatch loop in place, next to the interpreter sources:
+
+    python setup_native.py
+
+The interpreter falls back to its pure-Python loop when the extension is not built.
+"""
+from setuptools import Extension, setup
+
+setup(
+    name='reverse-polish-calculator-native',
+    ext_modules=[Extension('reverse_polish_calculator._dispatch', ['src/reverse_polish_calculator/_dispatch.c'])],
+    package_dir={'': 'src'},
+    script_args=['build_ext', '--inplace', '--force'],
+)
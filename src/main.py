@@ -2,6 +2,7 @@ from argparse import ArgumentParser, FileType
 from sys import stderr, stdout
 
 from reverse_polish_calculator.rpnlanginterpreter import RpnlangInterpreter as Rpn
+from reverse_polish_calculator.tracer import Tracer
 
 from signal import signal, SIGINT
 from sys import exit
@@ -27,9 +28,14 @@ def get_args():
     parser.add_argument('-H', '--command-help', action='store_true', help="show the help page for commands")
     parser.add_argument('-v', '--verbosity', help='indicate how many characters to display for stack abbreviations'
                                                   'this only has an effect in interactive mode', type=int, default=0)
+    parser.add_argument('-t', '--trace', help='write execution trace events and counters to the specified file '
+                                              'as JSON lines', type=FileType('w'))
+    parser.add_argument('-l', '--load-image', help='start from the symbols, stack and display base saved in the '
+                                                   'specified image file, before evaluating anything else')
+    parser.add_argument('-s', '--save-image', help='save the symbols, stack and display base to the specified '
+                                                   'image file after evaluating everything else')
     group = parser.add_mutually_exclusive_group()
-    group.add_argument('-d', '--dec', help='output/display values as decimal numbers (default)', default=True,
-                       action='store_true')
+    group.add_argument('-d', '--dec', help='output/display values as decimal numbers (default)', action='store_true')
     group.add_argument('-o', '--oct', help='output/display values as octal numbers', action='store_true')
     group.add_argument('-x', '--hex', help='output/display values as octal numbers', action='store_true')
     group.add_argument('-b', '--bin', help='output/display values as octal numbers', action='store_true')
@@ -57,12 +63,26 @@ def run_interactive(rpn):
 
 def run(args):
     base = get_base(args)
-    rpn = Rpn(base, args.verbosity, ' '.join(args.expression))
-    if args.file:
-        f = args.file.read()
-        rpn.evaluate(f)
-    elif args.interactive:
-        run_interactive(rpn)
+    tracer = Tracer(file=args.trace) if args.trace else None
+    rpn = Rpn(base, args.verbosity, tracer=tracer)
+    try:
+        if args.load_image:
+            rpn.load_image(args.load_image)
+            # A base given on the command line takes precedence over the one saved in the image.
+            if args.dec or args.bin or args.oct or args.hex:
+                rpn.set_display_mode_number_base(base)
+        rpn.evaluate(' '.join(args.expression))
+        if args.file:
+            f = args.file.read()
+            rpn.evaluate(f)
+        elif args.interactive:
+            run_interactive(rpn)
+        if args.save_image:
+            rpn.save_image(args.save_image)
+    finally:
+        # Failed runs are the ones worth debugging, so always record the counters.
+        if tracer:
+            tracer.close()
     return rpn
 
 
@@ -0,0 +1,257 @@
+/*
+ * Optional native dispatch loop for RpnlangInterpreter, see nativedispatch.py.
+ *
+ * It follows RpnlangInterpreter._run_plain exactly: operators listed in the native operations table
+ * (the arithmetic, bitwise, boolean and comparison operators of pure_operations) are computed here,
+ * everything else is handed back to the interpreter's `_compute` and `_expand_symbol`.
+ * Arguments are popped before computing, as `_compute` does, so the stack matches after errors too.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+/* Must match NATIVE_OPERATIONS in nativedispatch.py. */
+enum {
+    OP_ADD, OP_SUB, OP_MUL, OP_DIV, OP_MOD, OP_INC, OP_DEC,
+    OP_BIT_AND, OP_BIT_OR, OP_BIT_XOR, OP_LSHIFT, OP_RSHIFT, OP_BIT_NOT,
+    OP_AND, OP_OR, OP_XOR, OP_NOT,
+    OP_NE, OP_LT, OP_GT, OP_LE, OP_GE, OP_EQ,
+    OP_COUNT
+};
+
+static PyObject *str_value, *str_token_type, *str_stack, *str_compute, *str_expand_symbol;
+static PyObject *one;
+
+static int
+arity_of(int code)
+{
+    switch (code) {
+    case OP_INC: case OP_DEC: case OP_BIT_NOT: case OP_NOT:
+        return 1;
+    default:
+        return 2;
+    }
+}
+
+static PyObject *
+truth(PyObject *a, int negate)
+{
+    int t = PyObject_IsTrue(a);
+    if (t < 0)
+        return NULL;
+    return PyLong_FromLong(negate ? !t : t);
+}
+
+static PyObject *
+compare(PyObject *a, PyObject *b, int op)
+{
+    /* int(a < b) rather than PyObject_RichCompareBool, which treats identical objects as equal (e.g. nan). */
+    PyObject *r = PyObject_RichCompare(a, b, op);
+    if (r == NULL)
+        return NULL;
+    PyObject *result = truth(r, 0);
+    Py_DECREF(r);
+    return result;
+}
+
+static PyObject *
+operate(int code, PyObject *a, PyObject *b)
+{
+    int ta, tb;
+    switch (code) {
+    case OP_ADD: return PyNumber_Add(a, b);
+    case OP_SUB: return PyNumber_Subtract(a, b);
+    case OP_MUL: return PyNumber_Multiply(a, b);
+    case OP_DIV: return PyNumber_TrueDivide(a, b);
+    case OP_MOD: return PyNumber_Remainder(a, b);
+    case OP_INC: return PyNumber_Add(a, one);
+    case OP_DEC: return PyNumber_Subtract(a, one);
+    case OP_BIT_AND: return PyNumber_And(a, b);
+    case OP_BIT_OR: return PyNumber_Or(a, b);
+    case OP_BIT_XOR: return PyNumber_Xor(a, b);
+    case OP_LSHIFT: return PyNumber_Lshift(a, b);
+    case OP_RSHIFT: return PyNumber_Rshift(a, b);
+    case OP_BIT_NOT: return PyNumber_Invert(a);
+    case OP_AND:
+        /* int(bool(a) and bool(b)) */
+        if ((ta = PyObject_IsTrue(a)) <= 0)
+            return ta < 0 ? NULL : PyLong_FromLong(0);
+        return truth(b, 0);
+    case OP_OR:
+        /* int(bool(a) or bool(b)) */
+        if ((ta = PyObject_IsTrue(a)) != 0)
+            return ta < 0 ? NULL : PyLong_FromLong(1);
+        return truth(b, 0);
+    case OP_XOR:
+        if ((ta = PyObject_IsTrue(a)) < 0 || (tb = PyObject_IsTrue(b)) < 0)
+            return NULL;
+        return PyLong_FromLong(ta != tb);
+    case OP_NOT: return truth(a, 1);
+    case OP_NE: return compare(a, b, Py_NE);
+    case OP_LT: return compare(a, b, Py_LT);
+    case OP_GT: return compare(a, b, Py_GT);
+    case OP_LE: return compare(a, b, Py_LE);
+    case OP_GE: return compare(a, b, Py_GE);
+    case OP_EQ: return compare(a, b, Py_EQ);
+    }
+    PyErr_Format(PyExc_ValueError, "unknown native operation code %d", code);
+    return NULL;
+}
+
+static PyObject *
+get_stack(PyObject *interpreter)
+{
+    PyObject *stack = PyObject_GetAttr(interpreter, str_stack);
+    if (stack != NULL && !PyList_Check(stack)) {
+        PyErr_SetString(PyExc_TypeError, "interpreter stack must be a list");
+        Py_CLEAR(stack);
+    }
+    return stack;
+}
+
+/* Pop the top `arity` items off the stack and push the result of the native operation `code`. */
+static int
+run_native(PyObject *stack, int code)
+{
+    Py_ssize_t size = PyList_GET_SIZE(stack);
+    int arity = arity_of(code);
+    PyObject *a = PyList_GET_ITEM(stack, size - arity);
+    PyObject *b = arity == 2 ? PyList_GET_ITEM(stack, size - 1) : NULL;
+    Py_INCREF(a);
+    Py_XINCREF(b);
+    PyObject *result = NULL;
+    if (PyList_SetSlice(stack, size - arity, size, NULL) == 0)
+        result = operate(code, a, b);
+    Py_DECREF(a);
+    Py_XDECREF(b);
+    if (result == NULL)
+        return -1;
+    int status = PyList_Append(stack, result);
+    Py_DECREF(result);
+    return status;
+}
+
+/* Evaluate one token, returning -1 with an exception set on failure. `*stack` is refreshed when it may change. */
+static int
+step(PyObject *interpreter, PyObject **stack, PyObject *token, PyObject *operator_type, PyObject *symbol_type,
+     PyObject *native_operations, PyObject *compute, PyObject *expand_symbol)
+{
+    int status = -1;
+    PyObject *token_type = PyObject_GetAttr(token, str_token_type);
+    PyObject *value = token_type ? PyObject_GetAttr(token, str_value) : NULL;
+    if (value == NULL)
+        goto done;
+
+    if (token_type == operator_type) {
+        PyObject *code = PyDict_GetItemWithError(native_operations, value);
+        if (code == NULL && PyErr_Occurred())
+            goto done;
+        if (code != NULL) {
+            int native_code = (int)PyLong_AsLong(code);
+            if (native_code == -1 && PyErr_Occurred())
+                goto done;
+            if (native_code < 0 || native_code >= OP_COUNT) {
+                PyErr_Format(PyExc_ValueError, "unknown native operation code %d", native_code);
+                goto done;
+            }
+            /* Let `_compute` raise its own error when there are too few arguments. */
+            if (PyList_GET_SIZE(*stack) >= arity_of(native_code)) {
+                status = run_native(*stack, native_code);
+                goto done;
+            }
+        }
+        PyObject *result = PyObject_CallFunctionObjArgs(compute, value, NULL);
+        /* Return before touching the interpreter again, the C API must not be called with an exception set. */
+        if (result == NULL)
+            goto done;
+        Py_SETREF(*stack, get_stack(interpreter));
+        if (*stack != NULL)
+            status = result == Py_None ? 0 : PyList_Append(*stack, result);
+        Py_DECREF(result);
+    }
+    else if (token_type == symbol_type) {
+        PyObject *result = PyObject_CallFunctionObjArgs(expand_symbol, value, NULL);
+        if (result == NULL)
+            goto done;
+        Py_DECREF(result);
+        Py_SETREF(*stack, get_stack(interpreter));
+        if (*stack != NULL)
+            status = 0;
+    }
+    else {
+        status = PyList_Append(*stack, value);
+    }
+
+done:
+    Py_XDECREF(token_type);
+    Py_XDECREF(value);
+    return status;
+}
+
+PyDoc_STRVAR(run_doc,
+"run(interpreter, tokens, operator_type, symbol_type, native_operations)\n"
+"\n"
+"Pop and evaluate tokens until `tokens` is empty, as RpnlangInterpreter._run_plain does.\n"
+"`native_operations` maps Operator objects to the native operation codes.");
+
+static PyObject *
+run(PyObject *module, PyObject *args)
+{
+    PyObject *interpreter, *tokens, *operator_type, *symbol_type, *native_operations;
+    if (!PyArg_ParseTuple(args, "OO!OOO!:run", &interpreter, &PyList_Type, &tokens, &operator_type, &symbol_type,
+                          &PyDict_Type, &native_operations))
+        return NULL;
+
+    PyObject *compute = PyObject_GetAttr(interpreter, str_compute);
+    PyObject *expand_symbol = compute ? PyObject_GetAttr(interpreter, str_expand_symbol) : NULL;
+    PyObject *stack = expand_symbol ? get_stack(interpreter) : NULL;
+    int status = stack ? 0 : -1;
+
+    while (status == 0 && PyList_GET_SIZE(tokens) > 0) {
+        /* Long native-only runs never return to the eval loop, so let Ctrl-C through here. */
+        if (PyErr_CheckSignals() < 0) {
+            status = -1;
+            break;
+        }
+        Py_ssize_t last = PyList_GET_SIZE(tokens) - 1;
+        PyObject *token = PyList_GET_ITEM(tokens, last);
+        Py_INCREF(token);
+        status = PyList_SetSlice(tokens, last, last + 1, NULL);
+        if (status == 0)
+            status = step(interpreter, &stack, token, operator_type, symbol_type, native_operations, compute,
+                          expand_symbol);
+        Py_DECREF(token);
+    }
+
+    Py_XDECREF(compute);
+    Py_XDECREF(expand_symbol);
+    Py_XDECREF(stack);
+    if (status < 0)
+        return NULL;
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef dispatch_methods[] = {
+    {"run", run, METH_VARARGS, run_doc},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef dispatch_module = {
+    PyModuleDef_HEAD_INIT,
+    "_dispatch",
+    "Native dispatch loop for RpnlangInterpreter.",
+    -1,
+    dispatch_methods,
+};
+
+PyMODINIT_FUNC
+PyInit__dispatch(void)
+{
+    if (!(str_value = PyUnicode_InternFromString("value"))
+        || !(str_token_type = PyUnicode_InternFromString("token_type"))
+        || !(str_stack = PyUnicode_InternFromString("_stack"))
+        || !(str_compute = PyUnicode_InternFromString("_compute"))
+        || !(str_expand_symbol = PyUnicode_InternFromString("_expand_symbol"))
+        || !(one = PyLong_FromLong(1)))
+        return NULL;
+    return PyModule_Create(&dispatch_module);
+}
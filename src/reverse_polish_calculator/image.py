@@ -0,0 +1,80 @@
+import json
+import os
+import struct
+import zlib
+from hashlib import sha256
+from tempfile import NamedTemporaryFile
+
+IMAGE_MAGIC = b'RPNI'
+IMAGE_VERSION = 1
+IMAGE_EXTENSION = '.rpni'
+
+# magic, format version, operator set fingerprint
+_HEADER = struct.Struct('>4sH32s')
+
+
+def operator_fingerprint(operations: dict) -> bytes:
+    """
+    Digest of the names and arities of the given operations.
+    Symbol bodies refer to operators by name, so an image is only valid for the operator set it was saved with.
+    """
+    signature = '\n'.join(f'{name} {operation.arity}' for name, operation in sorted(operations.items()))
+    return sha256(signature.encode()).digest()
+
+
+def dump_image(path, fingerprint: bytes, symbols: dict, stack: list, display_mode_number_base: int):
+    """
+    Write an image to `path`. The previous file at `path`, if any, is only replaced once the image is complete.
+    """
+    try:
+        payload = json.dumps({
+            'symbols': symbols,
+            'stack': stack,
+            'display_mode_number_base': display_mode_number_base,
+        }, separators=(',', ':'))
+    except ValueError as error:
+        raise ValueError(f'Image Error: Could not save the image: {error}')
+    image = _HEADER.pack(IMAGE_MAGIC, IMAGE_VERSION, fingerprint) + zlib.compress(payload.encode())
+
+    directory = os.path.dirname(os.path.abspath(path))
+    file = NamedTemporaryFile('wb', dir=directory, prefix='.' + os.path.basename(path), delete=False)
+    try:
+        with file:
+            file.write(image)
+        # Temporary files are private, give the image the permissions `open` would have.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(file.name, 0o666 & ~umask)
+        os.replace(file.name, path)
+    except BaseException:
+        os.remove(file.name)
+        raise
+
+
+def load_image(path, fingerprint: bytes) -> dict:
+    """
+    Read an image written by `dump_image`, rejecting it unless it matches the current format and operator set.
+    :return: A dict with the keys 'symbols', 'stack' and 'display_mode_number_base'.
+    """
+    with open(path, 'rb') as file:
+        header = file.read(_HEADER.size)
+        body = file.read()
+    if len(header) != _HEADER.size:
+        raise ValueError('Image Error: File is too short to be an image.')
+    magic, version, image_fingerprint = _HEADER.unpack(header)
+    if magic != IMAGE_MAGIC:
+        raise ValueError('Image Error: File is not an image.')
+    if version != IMAGE_VERSION:
+        raise ValueError(f"Image Error: Unsupported image version '{version}', expected '{IMAGE_VERSION}'.")
+    if image_fingerprint != fingerprint:
+        raise ValueError('Image Error: Image was saved with a different set of operators. Please rebuild it.')
+    try:
+        state = json.loads(zlib.decompress(body))
+    except (zlib.error, ValueError):
+        raise ValueError('Image Error: Image is corrupt.')
+    if not (isinstance(state, dict)
+            and isinstance(state.get('symbols'), dict)
+            and isinstance(state.get('stack'), list)
+            and isinstance(state.get('display_mode_number_base'), int)):
+        raise ValueError('Image Error: Image is corrupt.')
+    return state
@@ -0,0 +1,36 @@
+"""
+Optional native dispatch loop, implemented by the `_dispatch` extension module.
+Build it with `python setup_native.py`. Without it, the interpreter falls back to its pure-Python loop.
+"""
+from .operator import pure_operations
+from .token import TokenType
+
+try:
+    from . import _dispatch
+except ImportError:
+    _dispatch = None
+
+# Operators computed natively. The position of each name is its code, which must match the enum in _dispatch.c.
+NATIVE_OPERATIONS = (
+    '+', '-', '*', '/', '%', '++', '--',
+    '&', '|', '^', '<<', '>>', '~',
+    '&&', '||', '^^', '!',
+    '!=', '<', '>', '<=', '>=', '==',
+)
+
+_native_operation_codes = {
+    operation: NATIVE_OPERATIONS.index(operation.name)
+    for operation in set().union(*pure_operations.values())
+    if operation.name in NATIVE_OPERATIONS
+}
+
+
+def is_available() -> bool:
+    return _dispatch is not None
+
+
+def run(interpreter, tokens: list):
+    """
+    Evaluate `tokens` on `interpreter` like `RpnlangInterpreter._run_plain`.
+    """
+    _dispatch.run(interpreter, tokens, TokenType.OPERATOR, TokenType.SYMBOL, _native_operation_codes)
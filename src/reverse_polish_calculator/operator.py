@@ -5,11 +5,20 @@ from socket import htonl, htons, ntohl, ntohs
 
 
 class Operator:
+    __slots__ = ('_name', '_arity', '_operation', '_description')
+
     def __init__(self, name, arity, operation, description=''):
-        self._name = name
-        self._arity = arity
-        self._operation = operation
-        self._description = description
+        # Operators are shared by every token and interpreter, so they cannot be changed once created.
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_arity', arity)
+        object.__setattr__(self, '_operation', operation)
+        object.__setattr__(self, '_description', description)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Operator '{self._name}' is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Operator '{self._name}' is immutable")
 
     @property
     def name(self):
@@ -24,8 +33,7 @@ class Operator:
         return self._arity
 
     def operate(self, *args):
-        result = self._operation(*args)
-        return result
+        return self._operation(*args)
 
     def __str__(self):
         return self.name
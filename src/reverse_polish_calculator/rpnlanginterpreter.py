@@ -4,13 +4,19 @@ from tabulate import tabulate
 
 from .bracketparser import BracketParser
 from .helpers import identity, float_to_bin, float_to_oct, float_to_hex, clamp
+from . import nativedispatch
+from .image import IMAGE_EXTENSION, dump_image, load_image, operator_fingerprint
 from .operator import Operator, pure_operations
 from .token import Token, TokenType
+from .tracer import Tracer
 
 
 class RpnlangInterpreter:
-    def __init__(self, display_mode_number_base=10, verbosity=0, expression=None):
+    def __init__(self, display_mode_number_base=10, verbosity=0, expression=None, tracer: Tracer = None,
+                 native_dispatch=True):
         self._verbosity = verbosity
+        # Use the native dispatch loop when it is built, unless disabled.
+        self._native_dispatch = native_dispatch and nativedispatch.is_available()
         self._display_mode_number_base = 0
         self.set_display_mode_number_base(display_mode_number_base)
         self._clear_stack()
@@ -18,9 +24,11 @@ class RpnlangInterpreter:
         self._tokens = []
         self._bracket_parser = BracketParser('{', '}')
         self._operations = {}
+        self._operator_tokens = {}
         self._include_operation_groups(pure_operations)
         self._include_operation_groups(self._get_scripting_operations())
         self._include_operation_groups(self._get_interactive_operations())
+        self.set_tracer(tracer)
         self._running = True
         if expression:
             self.evaluate(expression)
@@ -36,6 +44,38 @@ class RpnlangInterpreter:
             raise ValueError(f"Value Error: Unsupported number base: '{base}'. Please use any one of: {options}.")
         self._display_mode_number_base = base
 
+    @property
+    def tracer(self):
+        return self._tracer
+
+    def set_tracer(self, tracer: Tracer = None):
+        """
+        Install or remove (with None) a tracer.
+
+        The dispatch loop and hooks are chosen here, once, so that evaluation without a tracer
+        runs the plain loop and pays nothing for instrumentation.
+        Hooks shadow the hooked methods on the instance, so they are only seen by code that looks the method
+        up on `self` when it runs, see `_get_scripting_operations`.
+        """
+        self._tracer = tracer
+        hooks = {
+            '_tokenize': self._traced_tokenize,
+            '_compute': self._traced_compute,
+            '_expand_symbol': self._traced_expand_symbol,
+            '_assign': self._traced_assign,
+        }
+        for name, hook in hooks.items():
+            if tracer is None:
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, hook)
+        if tracer is not None:
+            self._run = self._run_traced
+        elif self._native_dispatch:
+            self._run = self._run_native
+        else:
+            self._run = self._run_plain
+
     @property
     def result(self):
         return self._format_output(self._stack[-1]) if self._stack else ''
@@ -57,9 +97,36 @@ class RpnlangInterpreter:
         :return: self
         """
         self._tokenize(expression)
+        self._run()
+        return self
+
+    def _run_plain(self):
+        # This is the hot loop, so look up names only once.
+        # `self._stack` is not cached because operators such as `clr` and `roll` replace it.
+        tokens = self._tokens
+        operator_type = TokenType.OPERATOR
+        symbol_type = TokenType.SYMBOL
+        compute = self._compute
+        while tokens:
+            contents, token_type = tokens.pop()
+            if token_type is operator_type:
+                calculated_value = compute(contents)
+                if calculated_value is not None:
+                    self._stack.append(calculated_value)
+            elif token_type is symbol_type:
+                self._expand_symbol(contents)
+            else:
+                self._stack.append(contents)
+
+    def _run_native(self):
+        nativedispatch.run(self, self._tokens)
+
+    def _run_traced(self):
+        tracer = self._tracer
         while self._tokens:
             token = self._tokens.pop()
-            contents, token_type = tuple(token)
+            tracer.instruction(token, self._stack)
+            contents, token_type = token
             if token_type == TokenType.OPERATOR:
                 calculated_value = self._compute(contents)
                 if calculated_value is not None:
@@ -68,14 +135,41 @@ class RpnlangInterpreter:
                 self._expand_symbol(contents)
             else:
                 self._stack.append(contents)
-
-        return self
+            tracer.observe_depth(len(self._stack))
+
+    def _traced_tokenize(self, expression: str):
+        before = len(self._tokens)
+        RpnlangInterpreter._tokenize(self, expression)
+        self._tracer.count('tokens_lexed', len(self._tokens) - before)
+
+    def _traced_compute(self, operation: Operator):
+        tracer = self._tracer
+        tracer.count('operators_dispatched')
+        tracer.emit('compute', phase='enter', operator=operation.name, depth=len(self._stack))
+        result = RpnlangInterpreter._compute(self, operation)
+        tracer.emit('compute', phase='exit', operator=operation.name, depth=len(self._stack), result=result)
+        return result
+
+    def _traced_expand_symbol(self, symbol):
+        tracer = self._tracer
+        tracer.count('symbol_expansions')
+        tracer.emit('expand_symbol', phase='enter', symbol=symbol)
+        RpnlangInterpreter._expand_symbol(self, symbol)
+        tracer.emit('expand_symbol', phase='exit', symbol=symbol)
+
+    def _traced_assign(self, value, reference):
+        tracer = self._tracer
+        tracer.emit('assign', phase='enter', reference=reference, value=value)
+        RpnlangInterpreter._assign(self, value, reference)
+        tracer.emit('assign', phase='exit', reference=reference)
 
     def _compute(self, operation: Operator):
-        if len(self._stack) < operation.arity:
+        arity = operation.arity
+        if len(self._stack) < arity:
             raise TypeError(f"Stack Error: Not enough arguments to compute: '{operation.name}'.")
-        args = self._pop_many(operation.arity)
-        return operation.operate(*args)
+        if arity == 0:
+            return operation.operate()
+        return operation.operate(*self._pop_many(arity))
 
     def _expand_symbol(self, symbol):
         if symbol not in self._symbol_table:
@@ -98,12 +192,12 @@ class RpnlangInterpreter:
         self._tokens.extend([token for token in reversed(tokens) if token is not None])
 
     def _parse_token(self, token: str) -> Token:
-        supported_operators = self._operations
+        operator_tokens = self._operator_tokens
         bracket_parser = self._bracket_parser
         if token in (bracket_parser.opening, bracket_parser.closing) or not bracket_parser.valid:
             return self._parse_block_token(token)
-        elif token in supported_operators:
-            return Token(supported_operators[token], TokenType.OPERATOR)
+        elif token in operator_tokens:
+            return operator_tokens[token]
         else:
             return Token.parse_value_token(token)
 
@@ -133,13 +227,15 @@ class RpnlangInterpreter:
         if items == 0:
             return []
         popped_items = self._stack[-items:]  # the last `items` number of items
-        self._stack = self._stack[:-items]  # everything but the last `items` number of items.
+        del self._stack[-items:]  # in place, rather than copying everything but the last `items` number of items.
         return popped_items
 
     def _include_operation_groups(self, operation_groups):
         operations = set().union(*operation_groups.values())
         operations = {op.name: op for op in operations}
         self._operations.update(operations)
+        # Every occurrence of an operator shares a single token.
+        self._operator_tokens.update({name: Token(op, TokenType.OPERATOR) for name, op in operations.items()})
 
     def _format_block(self, block: str) -> str:
         if self._verbosity <= 0:
@@ -251,6 +347,28 @@ class RpnlangInterpreter:
         chars = [to_unicode(val) for val in self._stack]
         print(''.join(chars))
 
+    def save_image(self, path):
+        """
+        Write the symbols, stack and display base to an image file, to be restored later with `load_image`.
+        """
+        dump_image(path, operator_fingerprint(self._operations), self._symbol_table, self._stack,
+                   self._display_mode_number_base)
+
+    def load_image(self, path):
+        """
+        Replace the symbols, stack and display base with those saved in an image file.
+        """
+        state = load_image(path, operator_fingerprint(self._operations))
+        self.set_display_mode_number_base(state['display_mode_number_base'])
+        self._symbol_table = state['symbols']
+        self._stack[:] = state['stack']
+
+    @staticmethod
+    def _image_path(reference) -> str:
+        if not str(reference).startswith('&$'):
+            raise ValueError(f"Value Error: Expected a reference such as '&$name', but got '{reference}'.")
+        return reference[2:] + IMAGE_EXTENSION
+
     def help(self):
         command_reference = {}
         command_reference.update(pure_operations)
@@ -301,12 +419,18 @@ class RpnlangInterpreter:
         }
 
     def _get_scripting_operations(self):
+        """
+        Operators built here outlive any later call to `set_tracer`. Operators that call a hooked method
+        (`_tokenize`, `_compute`, `_expand_symbol` or `_assign`) must look it up on `self` when called,
+        e.g. through a lambda, rather than capture the bound method, or they will not be traced.
+        """
         return {
             'Memory Manipulation': {
                 Operator('del', 1, self._delete, "Delete a symbol from memory by name, e.g. '&$deleteMe del'"),
-                Operator('=', 2, self._assign, 'Assignment, assigns a global symbol name to a block or value, '
-                                               'symbol name must be passed as a reference, '
-                                               "e.g. '{ 1024 * } &$kb ='"),
+                Operator('=', 2, lambda value, reference: self._assign(value, reference),
+                         'Assignment, assigns a global symbol name to a block or value, '
+                         'symbol name must be passed as a reference, '
+                         "e.g. '{ 1024 * } &$kb ='"),
                 Operator('clr', 0, self._clear_stack, 'Clear the stack'),
                 Operator('cls', 0, self._clear_symbols, 'Clear all defined symbols'),
                 Operator('cla', 0, self._clear_all_memory, 'Clear all defined symbols and the stack'),
@@ -319,9 +443,15 @@ class RpnlangInterpreter:
                 Operator('swap', 2, self._swap, 'Swap the top 2 items on the top of the stack'),
                 Operator('roll', 1, self._roll_up, 'Roll the stack upwards by n'),
                 Operator('rolld', 1, self._roll_down, 'Roll the stack downwards by n'),
-                Operator('reverse', 0, self._stack.reverse, 'Reverse the stack'),
+                Operator('reverse', 0, lambda: self._stack.reverse(), 'Reverse the stack'),
                 Operator('puts', 0, self._puts,
-                         'Treat the stack as a sequence of unicode values, and print it as a string.')
+                         'Treat the stack as a sequence of unicode values, and print it as a string.'),
+                Operator('save-image', 1, lambda reference: self.save_image(self._image_path(reference)),
+                         'Save all defined symbols, the stack and the display base to an image file '
+                         f"named after a reference, e.g. '&$lib save-image' writes 'lib{IMAGE_EXTENSION}'"),
+                Operator('load-image', 1, lambda reference: self.load_image(self._image_path(reference)),
+                         'Replace all defined symbols, the stack and the display base with those in an image file '
+                         f"named after a reference, e.g. '&$lib load-image' reads 'lib{IMAGE_EXTENSION}'"),
             },
             'Control Flow': {
                 Operator('ifelse', 3, self._if_else,
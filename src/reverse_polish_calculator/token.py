@@ -1,5 +1,7 @@
 from enum import Enum, auto
+from functools import lru_cache
 from re import match
+from typing import Any, NamedTuple
 from .helpers import parse_float
 
 
@@ -18,20 +20,13 @@ class TokenType(Enum):
     HEX_FLOAT = auto()
 
 
-class Token:
-    def __init__(self, value, token_type):
-        self._value = value
-        self._token_type = token_type
-
-    @property
-    def value(self):
-        return self._value
-
-    @property
-    def token_type(self):
-        return self._token_type
+class Token(NamedTuple):
+    # Tokens are immutable tuples, so identical tokens can be shared instead of allocated for every occurrence.
+    value: Any
+    token_type: TokenType
 
     @classmethod
+    @lru_cache(maxsize=4096)
     def parse_value_token(cls, token):
         if match(r'^&?\$[a-zA-Z0-9_]+$', token):
             return cls(token, TokenType.REFERENCE if cls._is_reference(token) else TokenType.SYMBOL)
@@ -65,9 +60,5 @@ class Token:
         else:
             raise SyntaxError(f"Syntax Error: Token '{token}' is not a valid floating point value.")
 
-    def __iter__(self):
-        yield self.value
-        yield self.token_type
-
     def __str__(self):
         return str(self.value)
@@ -0,0 +1,60 @@
+import json
+from math import isfinite
+
+
+class Tracer:
+    """
+    Receives structured trace events from an interpreter and keeps execution counters.
+
+    Events are dicts with an 'event' key. They are passed to `callback` if one is given,
+    and written as JSON lines to `file` if one is given.
+    """
+
+    def __init__(self, callback=None, file=None):
+        self._callback = callback
+        self._file = file
+        self._counters = {
+            'tokens_lexed': 0,
+            'operators_dispatched': 0,
+            'symbol_expansions': 0,
+            'peak_stack_depth': 0,
+        }
+
+    @property
+    def counters(self):
+        return dict(self._counters)
+
+    def count(self, counter, n=1):
+        self._counters[counter] += n
+
+    def observe_depth(self, depth):
+        if depth > self._counters['peak_stack_depth']:
+            self._counters['peak_stack_depth'] = depth
+
+    def emit(self, event, **fields):
+        fields = {'event': event, **fields}
+        if self._callback is not None:
+            self._callback(fields)
+        if self._file is not None:
+            # JSON has no inf or nan, so write those as they are written in the language, e.g. 'inf'.
+            fields = {key: _finite_or_str(value) for key, value in fields.items()}
+            self._file.write(json.dumps(fields, default=str, allow_nan=False) + '\n')
+
+    def instruction(self, token, stack):
+        self.emit('instruction',
+                  token=str(token),
+                  token_type=token.token_type.name,
+                  depth=len(stack),
+                  top=stack[-1] if stack else None)
+
+    def close(self):
+        """
+        Emit the final counters as a 'summary' event and flush the trace file, if any.
+        """
+        self.emit('summary', **self._counters)
+        if self._file is not None:
+            self._file.flush()
+
+
+def _finite_or_str(value):
+    return str(value) if isinstance(value, float) and not isfinite(value) else value
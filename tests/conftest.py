@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The interpreter package lives in src/, next to main.py, and is not installed.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'src'))
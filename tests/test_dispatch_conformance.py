@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from reverse_polish_calculator import nativedispatch
+from reverse_polish_calculator.operator import Operator
+from reverse_polish_calculator.rpnlanginterpreter import RpnlangInterpreter
+from reverse_polish_calculator.token import Token, TokenType
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'examples')
+
+
+def read_example(name):
+    with open(os.path.join(EXAMPLES, name)) as file:
+        return file.read()
+
+
+PROGRAMS = [
+    # Arithmetic
+    '1 2 + 3 *', '7 2 -', '7 2 /', '7 2 %', '-7 2 %', '7.5 2 %', '5 ++ ++ --', '1.5 0x1.8 + 0b101 0o17 * +',
+    '1 0 /', '1 0 %', '2 1000 <<', '10 ** 2',
+    # Bitwise
+    '12 10 &', '12 10 |', '12 10 ^', '1 10 <<', '1024 3 >>', '5 ~', '1.5 2 &', '1 -1 <<', '5 2 / 3 <<',
+    # Boolean
+    '1 0 &&', '0 1 &&', '0 0 &&', '1 2 &&', '0 0 ||', '1 0 ||', '0 3 ||',
+    '1 1 ^^', '1 0 ^^', '0 !', '7 !', '0.0 !', '{ } !',
+    # Comparison
+    '1 2 <', '2 2 <', '2 1 >', '2 2 >', '2 2 <=', '3 2 <=', '2 3 >=', '2 2 ==', '2 2.0 ==', '2 3 !=', '2 2 !=',
+    'inf inf - dup ==', 'inf inf - dup !=', '{ 1 } 2 <', '{ 1 } { 1 } ==',
+    # Blocks are strings, so numeric operators act on them as Python would
+    '{ a } { b } +', '{ a } 3 *', '{ a } 1 -', '{ a } 1 %', '{ a } ~', '{ a } ++',
+    # Operators not computed natively
+    'pi sin 2 sqrt 9 fact', '2 3 max 4 min', '9 3 log 2 10 pow', '1.7 floor 1.2 ceil 1.5 round -3 sign',
+    '-1 sqrt', 'true false', 'inf -inf',
+    # Stack manipulation
+    '1 2 3 4 5 2 dropn depth', '1 2 3 4 5 2 roll 3 rolld reverse 2 dupn', '1 2 swap - 3 peek',
+    '1 2 3 clr 4', '1 2 drop 3 dup', '1 2 3 clr 4 5 reverse', 'drop', 'dup', '1 clr drop',
+    # Not enough arguments
+    '+', '1 +', '~', '1 2 3 ifelse +',
+    # Symbols and control flow
+    '{ 2 * } &$d = 4 $d $d &$d del', '{ 2 * } &$d = 4 $d &$d del $d', '$undefined', '&$x',
+    '3 { 1 + } repeat', '0 5 { 1 + dup 3 % + } repeat', '0 { 5 } { 6 } ifelse 1 { 7 } if 0 { 8 } unless',
+    '{ dup 0 > { 1 - $count } if } &$count = 10 $count',
+    '1 2 3 { + } { - } ifelse',
+    # Syntax errors
+    'foo', '1..2', '}', '{ 1 2 +',
+    # Examples
+    read_example('factorial.rpn') + ' 7 $fact',
+    read_example('factorial.rpn') + ' 0 $fact',
+]
+
+
+def run(program, native_dispatch, setup=None):
+    rpn = RpnlangInterpreter(native_dispatch=native_dispatch)
+    if setup:
+        setup(rpn)
+    error = None
+    try:
+        rpn.evaluate(program)
+    except Exception as e:
+        error = (type(e), str(e))
+    # repr, so that nan and -0.0 compare by how they look rather than by value.
+    return repr(rpn._stack), repr(rpn._symbol_table), error
+
+
+@pytest.mark.skipif(not nativedispatch.is_available(), reason='native dispatch loop is not built')
+@pytest.mark.parametrize('program', PROGRAMS)
+def test_native_dispatch_matches_pure_python(program):
+    assert run(program, native_dispatch=True) == run(program, native_dispatch=False)
+
+
+def churn_and_raise(*args):
+    # Invalidate the interpreter type's attribute cache, so that the next attribute lookup on an interpreter
+    # takes the slow path, which misbehaves if it is made while an exception is pending.
+    for i in range(100):
+        setattr(RpnlangInterpreter, f'_churn{i}', i)
+        delattr(RpnlangInterpreter, f'_churn{i}')
+    raise ValueError('Value Error: raised from Python')
+
+
+def add_raising_operator(rpn):
+    operation = Operator('raise', 0, churn_and_raise)
+    rpn._operations['raise'] = operation
+    rpn._operator_tokens['raise'] = Token(operation, TokenType.OPERATOR)
+
+
+def raise_on_symbol_expansion(rpn):
+    rpn._expand_symbol = churn_and_raise
+
+
+@pytest.mark.skipif(not nativedispatch.is_available(), reason='native dispatch loop is not built')
+@pytest.mark.parametrize('program, setup', [
+    ('1 raise 2', add_raising_operator),
+    ('1 2 + { raise } &$r = $r 3', add_raising_operator),
+    ('1 $s 2', raise_on_symbol_expansion),
+])
+def test_native_dispatch_propagates_python_errors(program, setup):
+    for _ in range(20):
+        result = run(program, native_dispatch=True, setup=setup)
+        assert result == run(program, native_dispatch=False, setup=setup)
+        assert result[2] == (ValueError, 'Value Error: raised from Python')
+
+
+@pytest.mark.skipif(not nativedispatch.is_available(), reason='native dispatch loop is not built')
+def test_native_dispatch_is_used_when_built():
+    rpn = RpnlangInterpreter()
+    assert rpn._run == rpn._run_native
+
+
+def test_falls_back_to_pure_python_when_not_built(monkeypatch):
+    monkeypatch.setattr(nativedispatch, '_dispatch', None)
+    rpn = RpnlangInterpreter()
+    assert rpn._run == rpn._run_plain
+    assert rpn.evaluate('2 3 + 4 *').result == '20'
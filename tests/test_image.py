@@ -0,0 +1,115 @@
+import struct
+import zlib
+
+import pytest
+
+import main
+from reverse_polish_calculator.image import IMAGE_VERSION
+from reverse_polish_calculator.operator import Operator
+from reverse_polish_calculator.rpnlanginterpreter import RpnlangInterpreter
+
+# magic, format version and operator set fingerprint
+HEADER_SIZE = 4 + 2 + 32
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / 'lib.rpni'
+    rpn = RpnlangInterpreter(16)
+    rpn.evaluate('{ 2 * } &$double = 3 &$three = inf -inf inf inf - -0.0 true false 1.5 { 1 } &$ref')
+    rpn.save_image(path)
+    return path, rpn
+
+
+def test_round_trip(image):
+    path, saved = image
+    rpn = RpnlangInterpreter()
+    rpn.load_image(path)
+    # repr, so that nan and -0.0 compare by how they look rather than by value.
+    assert repr(rpn._stack) == repr(saved._stack) == "[inf, -inf, nan, -0.0, True, False, 1.5, '{ 1 }', '&$ref']"
+    assert rpn._symbol_table == {'$double': '{ 2 * }', '$three': 3}
+    assert rpn._display_mode_number_base == 16
+    assert rpn.evaluate('clr 4 $double $three +').result == '0xb'
+
+
+def test_operators_work_on_loaded_stack(image):
+    path, _ = image
+    rpn = RpnlangInterpreter()
+    rpn.load_image(path)
+    rpn.evaluate('reverse')
+    assert rpn._stack[0] == '&$ref'
+
+
+def test_save_and_load_image_operators(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    RpnlangInterpreter(expression='{ 1 + } &$inc = 1 2 &$lib save-image')
+    assert (tmp_path / 'lib.rpni').exists()
+    rpn = RpnlangInterpreter(expression='9 &$lib load-image $inc +')
+    assert rpn._stack == [4]
+
+
+def test_reference_is_required(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with pytest.raises(ValueError, match='Expected a reference'):
+        RpnlangInterpreter(expression='1 save-image')
+
+
+def test_failed_save_keeps_previous_image(image):
+    path, _ = image
+    before = path.read_bytes()
+    rpn = RpnlangInterpreter(expression='2000 fact')
+    with pytest.raises(ValueError, match='Image Error: Could not save the image'):
+        rpn.save_image(path)
+    assert path.read_bytes() == before
+    assert [p.name for p in path.parent.iterdir()] == [path.name]
+
+
+def test_rejects_other_version(image):
+    path, _ = image
+    data = bytearray(path.read_bytes())
+    struct.pack_into('>H', data, 4, IMAGE_VERSION + 1)
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match='Unsupported image version'):
+        RpnlangInterpreter().load_image(path)
+
+
+def test_rejects_changed_operator_set(image):
+    path, _ = image
+    rpn = RpnlangInterpreter()
+    rpn._operations['square'] = Operator('square', 1, lambda a: a * a)
+    with pytest.raises(ValueError, match='different set of operators'):
+        rpn.load_image(path)
+
+
+@pytest.mark.parametrize('corrupt, message', [
+    (lambda data: data[:10], 'too short'),
+    (lambda data: b'XXXX' + data[4:], 'not an image'),
+    (lambda data: data[:-5], 'corrupt'),
+    (lambda data: data[:HEADER_SIZE] + b'garbage', 'corrupt'),
+    (lambda data: data[:HEADER_SIZE] + zlib.compress(b'[1, 2]'), 'corrupt'),
+])
+def test_rejects_corrupt_image(image, corrupt, message):
+    path, _ = image
+    path.write_bytes(corrupt(path.read_bytes()))
+    rpn = RpnlangInterpreter(expression='1 2')
+    with pytest.raises(ValueError, match=message):
+        rpn.load_image(path)
+    assert rpn._stack == [1, 2]
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr('sys.argv', ['rpn', *args])
+    return main.run(main.get_args()).result
+
+
+def test_cli_base_precedence(image, monkeypatch):
+    path, _ = image
+    assert run_cli(monkeypatch, '-l', str(path), '$three') == '0x3'
+    assert run_cli(monkeypatch, '-l', str(path), '-d', '$three') == '3'
+    assert run_cli(monkeypatch, '-l', str(path), '-b', '$three') == '0b11'
+
+
+def test_cli_save_image(tmp_path, monkeypatch):
+    path = str(tmp_path / 'cli.rpni')
+    run_cli(monkeypatch, '-s', path, '-o', '{ 8 * } &$octet =')
+    assert run_cli(monkeypatch, '-l', path, '1 $octet') == '0o10'
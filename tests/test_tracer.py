@@ -0,0 +1,72 @@
+import io
+import json
+import os
+
+from reverse_polish_calculator.rpnlanginterpreter import RpnlangInterpreter
+from reverse_polish_calculator.tracer import Tracer
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), 'examples')
+
+
+def read_example(name):
+    with open(os.path.join(EXAMPLES, name)) as file:
+        return file.read()
+
+
+def trace(*expressions):
+    events = []
+    tracer = Tracer(callback=events.append)
+    rpn = RpnlangInterpreter(tracer=tracer)
+    for expression in expressions:
+        rpn.evaluate(expression)
+    tracer.close()
+    return rpn, events
+
+
+def test_factorial_events_and_counters():
+    rpn, events = trace('3', read_example('factorial.rpn'))
+    assert rpn.result == '6'
+    assert events[-1] == {'event': 'summary', 'tokens_lexed': 55, 'operators_dispatched': 30,
+                          'symbol_expansions': 4, 'peak_stack_depth': 7}
+    assert events[0] == {'event': 'instruction', 'token': '3', 'token_type': 'DEC_INT', 'depth': 0, 'top': None}
+
+    # The definition of $fact is the first thing the script does.
+    assert [(event['event'], event.get('phase')) for event in events[3:9]] == [
+        ('instruction', None),
+        ('compute', 'enter'),
+        ('assign', 'enter'),
+        ('assign', 'exit'),
+        ('compute', 'exit'),
+        ('instruction', None),
+    ]
+    assert events[5]['reference'] == '&$fact'
+
+    def count(event, phase=None):
+        return sum(1 for e in events if e['event'] == event and e.get('phase') == phase)
+
+    assert count('compute', 'enter') == count('compute', 'exit') == 30
+    assert count('expand_symbol', 'enter') == count('expand_symbol', 'exit') == 4
+    assert count('instruction') == 55
+    assert max(e['depth'] for e in events if e['event'] == 'instruction') == 7
+
+
+def test_no_tracer_runs_plain_loop():
+    rpn = RpnlangInterpreter(native_dispatch=False)
+    rpn.set_tracer(Tracer())
+    rpn.set_tracer(None)
+    assert rpn._run == rpn._run_plain
+    assert '_compute' not in vars(rpn)
+
+
+def test_trace_file_is_strict_json_lines():
+    file = io.StringIO()
+    tracer = Tracer(file=file)
+    RpnlangInterpreter(expression='inf inf - -inf { 1 } &$x =', tracer=tracer)
+    tracer.close()
+
+    def reject(constant):
+        raise ValueError(f'non-standard JSON constant {constant}')
+
+    events = [json.loads(line, parse_constant=reject) for line in file.getvalue().splitlines()]
+    assert [e['result'] for e in events if e['event'] == 'compute' and e['phase'] == 'exit'] == \
+        ['inf', 'inf', 'nan', '-inf', None]